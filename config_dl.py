@@ -1,30 +1,117 @@
 import os
 import shutil
-from git import Repo
+import signal
+import subprocess
+from pathlib import Path
+from git import GitCommandError, Repo
 
 
 repo_path = "config_temp"
 repo_url = "https://github.com/Elwing-Chou/precommit_demo.git"
 
-# Clone if it doesn't exist, otherwise load
-try:
+# Keep a bare mirror cache: fetch incrementally if it exists, otherwise do a shallow blobless clone
+repo = None
+if os.path.isdir(repo_path):
     repo = Repo(repo_path)
-except:
-    repo = Repo.clone_from(repo_url, repo_path)
+    if not repo.bare or repo.git.config('--get', 'remote.origin.mirror', with_exceptions=False) != 'true':
+        # Cache left by the old non-bare clone: fetch would only move origin/main, so re-clone it as a mirror
+        repo.close()
+        shutil.rmtree(repo_path)
+        repo = None
+    else:
+        repo.remotes.origin.fetch(prune=True, depth=1)
+
+if repo is None:
+    repo = Repo.clone_from(repo_url, repo_path, mirror=True, filter='blob:none', depth=1)
+    # Tune the mirror once so later fetches use protocol v2, bitmaps, commit-graph and multi-pack-index
+    mirror_config = {
+        'protocol.version': '2',
+        'uploadpack.allowFilter': 'true',
+        'uploadpack.allowReachableSHA1InWant': 'true',
+        'pack.useBitmaps': 'true',
+        'pack.writeBitmaps': 'true',
+        'core.commitGraph': 'true',
+        'gc.writeCommitGraph': 'true',
+        'fetch.writeCommitGraph': 'true',
+        'core.multiPackIndex': 'true',
+        'fetch.unpackLimit': '1',
+        'receive.unpackLimit': '1',
+        'gc.auto': '0',
+        'pack.threads': '0',
+        'pack.deltaCacheSize': '256m',
+        'pack.windowMemory': '256m',
+    }
+    for key, value in mirror_config.items():
+        repo.git.config(key, value)
+    repo.git.commit_graph('write', '--reachable', '--split')
+    repo.git.multi_pack_index('write')
 
 git = repo.git
-git.checkout('main')
+revision = 'main'
 # checkout commit
-# git.checkout('abcdef12345')
+# revision = 'abcdef12345'
 
 
-source_directory = './config_temp/network_configs'
+source_directory = 'network_configs'
 destination_directory = './network_configs' # Replace with your destination directory path
+sync_marker = Path('./.last_sync')
+
+
+def extract(commit, paths):
+    """Materialise the given paths at commit via git archive | tar, without a working tree."""
+    archive = subprocess.Popen(
+        ['git', '--literal-pathspecs', '-C', repo_path, 'archive', commit, '--', *paths],
+        stdout=subprocess.PIPE
+    )
+    tar = subprocess.run(['tar', '-x', '-C', './'], stdin=archive.stdout)
+    archive.stdout.close()
+    archive.wait()
+    # A tar failure makes git archive die of SIGPIPE, so report tar's error in that case
+    if archive.returncode != 0 and not (tar.returncode != 0 and archive.returncode == -signal.SIGPIPE):
+        raise subprocess.CalledProcessError(archive.returncode, archive.args)
+    tar.check_returncode()
+
+
+def remove(path):
+    """Remove a deleted file and any directories it leaves empty under the destination."""
+    if os.path.exists(path):
+        os.remove(path)
+    parent = os.path.dirname(path)
+    while os.path.normpath(parent) != os.path.normpath(destination_directory) and os.path.isdir(parent) and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
 
-try:
+
+new = repo.commit(revision).hexsha
+old = sync_marker.read_text().strip() if sync_marker.exists() else None
+
+changes = None
+if old and os.path.exists(destination_directory):
+    try:
+        # -z keeps paths unquoted (no core.quotePath escaping); status and path alternate, NUL-separated
+        fields = git.diff('--name-status', '--no-renames', '-z', old, new, '--', source_directory).split('\0')
+        changes = list(zip(fields[0:-1:2], fields[1::2]))
+    except GitCommandError:
+        # Previous commit is no longer in the shallow mirror, fall back to a full extraction
+        changes = None
+
+if old == new and changes is not None:
+    print(f"Directory '{destination_directory}' is already at '{new}', nothing to sync")
+elif changes is not None:
+    updated = []
+    for status, path in changes:
+        if status == 'D':
+            remove(path)
+        else:
+            updated.append(path)
+    if updated:
+        extract(new, updated)
+    print(f"Synced {len(changes)} changed file(s) in '{destination_directory}' from '{old}' to '{new}'")
+else:
+    # First run or unknown previous state: materialise the whole network_configs subtree
     if os.path.exists(destination_directory):
         shutil.rmtree(destination_directory)
-    shutil.copytree(source_directory, destination_directory)
-    print(f"Directory '{source_directory}' successfully copied to '{destination_directory}'")
-except FileExistsError:
-    print(f"Error: Destination directory '{destination_directory}' already exists.")
+    extract(new, [source_directory])
+    print(f"Directory '{source_directory}' at '{revision}' successfully extracted to '{destination_directory}'")
+
+sync_marker.write_text(new)
@@ -1,45 +1,79 @@
-import threading
-import glob
 import os
+import shutil
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from scripts.cisco.v_12_2_2.build import FabricBuilder
-from fastapi import FastAPI
+from fastapi import BackgroundTasks, FastAPI
 from starlette.responses import FileResponse
 
 
 
 app = FastAPI()
 builder = FabricBuilder()
+# Builds are queued on a single worker so concurrent /build requests never run in parallel
+build_executor = ThreadPoolExecutor(max_workers=1)
+
+def append_file(source_f, f):
+    """Append source_f to f, letting the kernel copy the bytes with os.sendfile where supported."""
+    size = os.fstat(source_f.fileno()).st_size
+    offset = 0
+    if hasattr(os, "sendfile"):
+        try:
+            while offset < size:
+                sent = os.sendfile(f.fileno(), source_f.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            return
+        except OSError:
+            if offset:
+                raise
+    shutil.copyfileobj(source_f, f, length=1 << 16)
+
+def log_build_failure(future):
+    """Print the traceback of a failed queued build, since nothing else awaits its Future."""
+    if future.cancelled():
+        return
+    exc = future.exception()
+    if exc is not None:
+        print("Build failed:")
+        traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+def submit_build():
+    build_executor.submit(builder.build).add_done_callback(log_build_failure)
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "Root"}
 
 @app.get("/build")
-def build():
-    t = threading.Thread(target=builder.build)
-    t.start()
+async def build(background_tasks: BackgroundTasks):
+    background_tasks.add_task(submit_build)
     return {"response":"Build Started"}
 
 @app.post("/gitmerge")
-def gitmerge():
+async def gitmerge(background_tasks: BackgroundTasks):
     def job():
         # builder.build()
-        with open("./logs/pending.txt", "w", encoding="utf-8") as f:
-            fp_list = glob.glob("*_pending.txt")
-            for fp in fp_list:
-                f.write("-" * 10)
-                f.write(" {} ".format(fp))
-                f.write("-" * 10)
-                f.write("\n")
-                with open(fp, "r", encoding="utf-8") as source_f:
-                    f.write(source_f.read())
-                f.write("\n")
-    t = threading.Thread(target=job)
-    t.start()
+        # Unbuffered so header writes and sendfile copies land on the fd in order
+        with open("./logs/pending.txt", "wb", buffering=0) as f:
+            with os.scandir(".") as it:
+                for entry in it:
+                    if not (entry.is_file() and entry.name.endswith("_pending.txt")):
+                        continue
+                    f.write("{0} {1} {0}\n".format("-" * 10, entry.name).encode("utf-8"))
+                    with open(entry.path, "rb") as source_f:
+                        append_file(source_f, f)
+                    f.write(b"\n")
+    background_tasks.add_task(job)
     return {"response":"Merge Started", "url":"/pending"}
 
+@app.on_event("shutdown")
+def shutdown():
+    build_executor.shutdown(wait=False, cancel_futures=True)
+
 @app.get("/pending")
-def pending():
+async def pending():
     file_path = "./logs/pending.txt"
     if not os.path.exists(file_path):
         return {"error": "File not found"}
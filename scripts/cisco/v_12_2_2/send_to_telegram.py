@@ -1,17 +1,44 @@
+import os
+from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+# Token 與 chat_id 從 api/.env 讀取，不放在程式碼中
+load_dotenv(Path(__file__).resolve().parent / "api" / ".env")
 
 # 從 @BotFather 拿到的 Token
-TOKEN = "7978003158:AAHv2080OBxazfxSRvKhU-Ihx5rWORrzUm4"
+TOKEN = os.getenv("TELEGRAM_TOKEN")
 
 # 你的 chat_id （用 getUpdates 拿到）
-CHAT_ID = "8216101171"
+CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+
+_URL = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
+
+# 共用 Session，讓多次通知重用同一條 HTTPS 連線，並在暫時性錯誤時自動重試
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=3,
+        read=False,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    ),
+))
 
 
 def notify_telegram(msg: str):
     """發送訊息到 Telegram"""
-    url = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
-    payload = {"chat_id": CHAT_ID, "text": msg}
-    resp = requests.post(url, data=payload)
+    if not TOKEN or not CHAT_ID:
+        print("Error: TELEGRAM_TOKEN or TELEGRAM_CHAT_ID environment variable not set.")
+        return
+
+    resp = _SESSION.post(_URL, json={"chat_id": CHAT_ID, "text": msg}, timeout=5)
 
     if resp.status_code == 200:
         print(f"訊息已送出 ✔ ({msg})")
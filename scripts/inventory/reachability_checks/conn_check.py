@@ -2,10 +2,117 @@ import os
 import yaml
 import sys
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from netmiko import ConnectHandler
+import threading
+import time
+from netmiko import BaseConnection, ConnectHandler
 from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+# 若有安裝 google-re2 則使用（保證線性時間比對），否則退回標準 re；flag 以 inline 形式寫在 pattern 中以相容兩者
+try:
+    import re2 as _regex
+except ImportError:
+    _regex = re
+
+# show interface status 解析用的 regex（於 module 載入時編譯一次）
+# 以 MULTILINE 對整段輸出單次掃描，只有以 Eth / mgmt 開頭的行會回到 Python 處理
+_IFACE_RE = _regex.compile(r'(?im)^[^\S\n]*((Eth\d+(?:/\d+){1,2}|mgmt\d+)\b.*)$')
+_SPLIT_RE = _regex.compile(r'\s{2,}')
+
+# show interface status 中可辨識的狀態字
+STATUS_SET = frozenset({'connected', 'notconnect', 'disabled', 'err-disabled', 'suspended'})
+
+# 閒置超過此秒數的 SSH 連線會被背景清理
+CONNECTION_POOL_IDLE_TIMEOUT = 300
+
+
+class ConnectionPool:
+    """
+    以 (ip, port, username, platform) 為 key 的 Netmiko 連線池，重複檢查同一台設備時可省去 SSH handshake 與認證
+    """
+
+    def __init__(self, idle_timeout=CONNECTION_POOL_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._pool: dict[tuple, tuple[BaseConnection, float]] = {}
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    @staticmethod
+    def make_key(device):
+        return (device['host'], device.get('port', 22), device['username'], device['device_type'])
+
+    def get(self, device):
+        """
+        取得可用連線：池中有連線且通過健康檢查則重用，否則建立新連線
+        取出的連線在 release 前不會被其他 thread 使用
+        """
+        key = self.make_key(device)
+        with self._lock:
+            entry = self._pool.pop(key, None)
+
+        if entry is not None:
+            connection = entry[0]
+            try:
+                connection.find_prompt()
+                return connection
+            except Exception:
+                self.disconnect(connection)
+
+        return ConnectHandler(**device)
+
+    def release(self, key, connection):
+        """
+        將連線放回池中並更新 last_used
+        """
+        with self._lock:
+            stale = self._pool.pop(key, None)
+            self._pool[key] = (connection, time.monotonic())
+            self._schedule_sweep()
+        if stale is not None and stale[0] is not connection:
+            self.disconnect(stale[0])
+
+    def sweep(self):
+        """
+        關閉閒置超過 idle_timeout 的連線
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._sweeper = None
+            expired = [key for key, (_, last_used) in self._pool.items() if now - last_used > self.idle_timeout]
+            connections = [self._pool.pop(key)[0] for key in expired]
+            if self._pool:
+                self._schedule_sweep()
+        for connection in connections:
+            self.disconnect(connection)
+
+    def _schedule_sweep(self):
+        # 需在持有 _lock 時呼叫
+        if self._sweeper is None:
+            self._sweeper = threading.Timer(self.idle_timeout, self.sweep)
+            self._sweeper.daemon = True
+            self._sweeper.start()
+
+    @staticmethod
+    def disconnect(connection):
+        """
+        關閉連線（忽略關閉時的錯誤），用於不可再放回池中的連線
+        """
+        try:
+            connection.disconnect()
+        except Exception:
+            pass
+
+
+POOL = ConnectionPool()
+
 
 def parse_interface_status_output(output):
     """
@@ -13,91 +120,75 @@ def parse_interface_status_output(output):
     """
     interface_status = {}
 
-    # 分割輸出為行並找到interface條目
-    lines = output.split('\n')
-
-    for line in lines:
-        # 移除行首空白，檢查是否以 Eth 或 mgmt 開頭
-        s = line.lstrip()
-        m = re.match(r'^(Eth\d+(?:/\d+){1,2}|mgmt\d+)\b', s, re.IGNORECASE)
-        if m:
-            interface = m.group(1)
-            status = 'unknown'
-
-            # 優先使用 token 掃描法：跳過第一個 interface token，逐個 token 檢查是否為已知狀態字
-            tokens = s.split()
-            status_keywords = {'connected', 'notconnect', 'not', 'disabled', 'err-disabled', 'err-disabled',
-                               'suspended'}
-            for t in tokens[1:]:
-                tt = t.strip().lower()
-                # 直接比對 token（避免匹配到像 connected-to-... 這種描述）
-                if tt in status_keywords:
-                    # normalize some variants
-                    if tt == 'not':
-                        status = 'notconnect'
-                    else:
-                        status = tt
-                    break
-
-            if status == 'unknown':
-                # 若 token 掃描沒找到，再用原來的關鍵字搜尋或分欄方式備援
-                lower = s.lower()
-                if re.search(r'\berr-?disabled\b', lower):
-                    status = 'err-disabled'
-                elif re.search(r'\bdisabled\b', lower):
-                    status = 'disabled'
-                elif re.search(r'\bnot\s*connect\b|\bnotconnect\b', lower):
-                    status = 'notconnect'
-                elif re.search(r'\bsuspended\b', lower):
-                    status = 'suspended'
-                elif re.search(r'\bconnected\b', lower):
-                    status = 'connected'
+    # 單次掃描整段輸出，找出以 Eth 或 mgmt 開頭（允許行首空白）的interface條目
+    for m in _IFACE_RE.finditer(output):
+        s = m.group(1)
+        interface = m.group(2)
+        status = 'unknown'
+
+        # token 掃描法：跳過第一個 interface token，逐個 token 檢查是否為已知狀態字
+        # 直接比對 token（避免匹配到像 connected-to-... 這種描述）
+        tokens = s.split()
+        for i, t in enumerate(tokens[1:], 1):
+            tl = t.lower()
+            if tl in STATUS_SET:
+                status = tl
+                break
+            if tl == 'not' and i + 1 < len(tokens) and tokens[i + 1].lower() == 'connect':
+                status = 'notconnect'
+                break
+
+        if status == 'unknown':
+            # 若 token 掃描沒找到，改用分欄方式備援（Status 為第三欄）
+            parts = _SPLIT_RE.split(s)
+            if len(parts) >= 3:
+                status = parts[2].strip().lower()
+            elif len(tokens) >= 3:
+                status = tokens[2].lower()
+
+        interface_status[interface] = status
+
+    return interface_status
+
+
+@lru_cache(maxsize=1024)
+def _load_interfaces(yaml_file_path, mtime_ns, size):
+    """
+    解析YAML文件中沒有Policy的interface，以 (path, mtime, size) 為 cache key，檔案變更時自動失效
+    """
+    with open(yaml_file_path, 'rb') as file:
+        config = yaml.load(file, Loader=SafeLoader)
+
+    interfaces_without_policy = []
+
+    # 檢查是否有Interface配置
+    if isinstance(config, dict) and isinstance(config.get('Interface'), list):
+        for interface in config['Interface']:
+            if isinstance(interface, dict) and 'Policy' not in interface:
+                # 讀取 Enable Interface，若不存在預設為 True
+                enable_val = interface.get('Enable Interface', True)
+                # normalize various representations to boolean
+                if isinstance(enable_val, str):
+                    enable = enable_val.lower() in ('true', 'yes', '1')
                 else:
-                    parts = re.split(r'\s{2,}', s)
-                    if len(parts) >= 3:
-                        status = parts[2].strip().lower()
-                    else:
-                        parts2 = s.split()
-                        if len(parts2) >= 3:
-                            status = parts2[2].strip().lower()
+                    enable = bool(enable_val)
 
-            interface_status[interface] = status
+                interfaces_without_policy.append({
+                    'name': interface.get('Name', ''),
+                    'description': interface.get('Interface Description', ''),
+                    'enable': enable
+                })
 
-    return interface_status
+    # cache 內的結果會被共用，回傳 tuple 避免被呼叫端修改
+    return tuple(interfaces_without_policy)
 
 
 def get_interfaces_without_policy(yaml_file_path):
     """
-    從YAML文件中提取沒有Policy的interface
+    從YAML文件中提取沒有Policy的interface（解析失敗時直接拋出例外，由呼叫端處理）
     """
-    try:
-        with open(yaml_file_path, 'r', encoding='utf-8') as file:
-            config = yaml.safe_load(file)
-
-        interfaces_without_policy = []
-
-        # 檢查是否有Interface配置
-        if 'Interface' in config and isinstance(config['Interface'], list):
-            for interface in config['Interface']:
-                if isinstance(interface, dict) and 'Policy' not in interface:
-                    # 讀取 Enable Interface，若不存在預設為 True
-                    enable_val = interface.get('Enable Interface', True)
-                    # normalize various representations to boolean
-                    if isinstance(enable_val, str):
-                        enable = enable_val.lower() in ('true', 'yes', '1')
-                    else:
-                        enable = bool(enable_val)
-
-                    interfaces_without_policy.append({
-                        'name': interface.get('Name', ''),
-                        'description': interface.get('Interface Description', ''),
-                        'enable': enable
-                    })
-
-        return interfaces_without_policy
-    except Exception as e:
-        print(f"Error parsing interfaces from {yaml_file_path}: {e}")
-        return []
+    st = os.stat(yaml_file_path)
+    return _load_interfaces(yaml_file_path, st.st_mtime_ns, st.st_size)
 
 
 def check_device_interface_connectivity(device_info, username, password):
@@ -121,46 +212,57 @@ def check_device_interface_connectivity(device_info, username, password):
     }
 
     try:
-        # 連接到設備
-        connection = ConnectHandler(**device)
+        # 從連線池取得連線（必要時才建立新的 SSH session）
+        key = ConnectionPool.make_key(device)
+        connection = POOL.get(device)
         results['connected'] = True
-
-        # 獲取沒有Policy的interface列表
-        if 'filepath' in device_info:
-            interfaces_without_policy = get_interfaces_without_policy(device_info['filepath'])
-
-            if interfaces_without_policy:
-                # 執行show interface status命令
-                status_output = connection.send_command('show interface status')
-                interface_status_map = parse_interface_status_output(status_output)
-
-                # 檢查每個沒有policy的interface
-                for interface in interfaces_without_policy:
-                    interface_name = interface['name']
-                    description = interface['description']
-
-                    # 轉換interface名稱格式 (Ethernet1/1 -> Eth1/1)
-                    eth_name = interface_name.replace('Ethernet', 'Eth')
-
-                    status = interface_status_map.get(eth_name, 'not found')
-                    expected_enable = interface.get('enable', True)
-
-                    # Determine whether this interface matches the YAML config:
-                    # - If expected_enable is True, actual must be 'connected'
-                    # - If expected_enable is False, actual must NOT be 'connected'
-                    actual_is_connected = (status == 'connected')
-                    matches = (actual_is_connected and expected_enable) or (
-                                not actual_is_connected and not expected_enable)
-
-                    results['interface_results'].append({
-                        'name': interface_name,
-                        'description': description,
-                        'status': status,
-                        'expected_enable': expected_enable,
-                        'matches_config': matches
-                    })
-
-        connection.disconnect()
+        try:
+            # 獲取沒有Policy的interface列表
+            if 'filepath' in device_info:
+                interfaces_without_policy = get_interfaces_without_policy(device_info['filepath'])
+
+                if interfaces_without_policy:
+                    # 執行show interface status命令（直接以已知 prompt 判斷結束，省去 prompt 偵測）
+                    # 只用 hostname 不夠：interface description 常是 hostname（例如 Site1-L2），
+                    # 會在輸出中途誤判結束，因此需連同 prompt 結尾的 > 或 # 一起比對
+                    status_output = connection.send_command(
+                        'show interface status',
+                        expect_string=re.escape(connection.base_prompt) + r'[>#]',
+                        read_timeout=15,
+                        use_textfsm=False,
+                    )
+                    interface_status_map = parse_interface_status_output(status_output)
+
+                    # 檢查每個沒有policy的interface
+                    for interface in interfaces_without_policy:
+                        interface_name = interface['name']
+                        description = interface['description']
+
+                        # 轉換interface名稱格式 (Ethernet1/1 -> Eth1/1)
+                        eth_name = interface_name.replace('Ethernet', 'Eth')
+
+                        status = interface_status_map.get(eth_name, 'not found')
+                        expected_enable = interface.get('enable', True)
+
+                        # Determine whether this interface matches the YAML config:
+                        # - If expected_enable is True, actual must be 'connected'
+                        # - If expected_enable is False, actual must NOT be 'connected'
+                        actual_is_connected = (status == 'connected')
+                        matches = (actual_is_connected and expected_enable) or (
+                                    not actual_is_connected and not expected_enable)
+
+                        results['interface_results'].append({
+                            'name': interface_name,
+                            'description': description,
+                            'status': status,
+                            'expected_enable': expected_enable,
+                            'matches_config': matches
+                        })
+        except Exception:
+            # 指令執行中途失敗時 channel 可能殘留未讀取的輸出，不放回池中
+            POOL.disconnect(connection)
+            raise
+        POOL.release(key, connection)
 
     except NetmikoTimeoutException:
         results['error_message'] = "Connection Timeout"
@@ -172,13 +274,63 @@ def check_device_interface_connectivity(device_info, username, password):
     return results
 
 
+def _walk_yaml(root, depth=0):
+    """
+    以 os.scandir 遞迴列出 root 下的 YAML 檔案路徑，略過直接位於 root 的檔案（depth 0）
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_yaml(entry.path, depth + 1)
+            elif depth >= 1 and entry.name.lower().endswith(('.yaml', '.yml')) and entry.is_file():
+                yield entry.path
+
+
+def find_device_info(root):
+    """
+    以迭代方式搜尋 YAML 內容中的 IP address 與 hostname，兩者皆找到即停止
+    """
+    found = {}
+    stack = [root]
+    want = {'ip', 'hostname'}
+    while stack and want:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                kl = key.lower()
+                if kl in ('ip address', 'ip_address'):
+                    if 'ip' in want:
+                        found['ip'] = value
+                        want.discard('ip')
+                elif kl == 'hostname':
+                    if 'hostname' in want:
+                        found['hostname'] = value
+                        want.discard('hostname')
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        elif isinstance(obj, list):
+            stack.extend(obj)
+    return found
+
+
+def _load_yaml(filepath):
+    """
+    讀取單一 YAML 檔案，回傳 (filepath, data, error)
+    """
+    try:
+        with open(filepath, 'rb') as file:
+            return filepath, yaml.load(file, Loader=SafeLoader), None
+    except Exception as e:
+        return filepath, None, e
+
+
 def extract_devices_from_yaml(yaml_dir):
     """
     遍歷指定目錄及其所有子目錄中的YAML檔案，提取有IP address的設備資訊
     """
     device_list = []
     yaml_path = Path(yaml_dir)
-    seen_devices = set()  # 用於去重複
+    seen_devices: set[tuple[str, str]] = set()  # 用於去重複，key 為 (hostname, ip)
 
     if not yaml_path.exists():
         print(f"Directory {yaml_dir} does not exist!")
@@ -186,53 +338,29 @@ def extract_devices_from_yaml(yaml_dir):
 
     # 遞歸搜尋 node 資料夾下所有子目錄中的 YAML 檔案 (.yaml, .yml)
     # 注意： 不包含直接位於 node 資料夾根目錄下的 YAML 檔案，只搜尋 node/*/** 的檔案
-    for yaml_file in yaml_path.rglob("*"):
-        if not yaml_file.is_file():
-            continue
-        if yaml_file.suffix.lower() not in ('.yaml', '.yml'):
-            continue
-        # Skip files that are directly under the `node` folder (we only want nested folders)
-        try:
-            rel_parts = yaml_file.relative_to(yaml_path).parts
-        except Exception:
-            # If relative_to fails for any reason, skip this file
-            continue
-        if len(rel_parts) < 2:
-            # This means the file is directly under yaml_path (node/) and should be skipped
-            # Helpful debug print (kept minimal)
-            # print(f"Skipping top-level YAML file: {yaml_file}")
-            continue
+    # 以 thread pool 並行讀取並解析 YAML（C loader 解析期間不佔用 GIL），之後逐一搜尋設備資訊
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        loaded = list(executor.map(_load_yaml, _walk_yaml(str(yaml_path))))
+
+    for filepath, data, error in loaded:
         try:
-            with open(yaml_file, 'r', encoding='utf-8') as file:
-                data = yaml.safe_load(file)
+            if error is not None:
+                raise error
 
-            device_info = {'file': yaml_file.name, 'filepath': str(yaml_file)}
+            device_info = {'file': os.path.basename(filepath), 'filepath': filepath}
 
             # 搜尋設備資訊
-            def find_device_info(obj):
-                if isinstance(obj, dict):
-                    for key, value in obj.items():
-                        if key.lower() == 'ip address' or key.lower() == 'ip_address':
-                            device_info['ip'] = value
-                        elif key.lower() == 'hostname':
-                            device_info['hostname'] = value
-                        elif isinstance(value, (dict, list)):
-                            find_device_info(value)
-                elif isinstance(obj, list):
-                    for item in obj:
-                        find_device_info(item)
-
-            find_device_info(data)
+            device_info.update(find_device_info(data))
 
             # 只有當設備有IP address和hostname時才加入清單
             if 'ip' in device_info and 'hostname' in device_info:
-                device_key = f"{device_info['hostname']}_{device_info['ip']}"
+                device_key = (device_info['hostname'], device_info['ip'])
                 if device_key not in seen_devices:
                     seen_devices.add(device_key)
                     device_list.append(device_info)
 
         except Exception as e:
-            print(f"Error reading {yaml_file}: {e}")
+            print(f"Error reading {filepath}: {e}")
 
     return device_list
 
@@ -272,40 +400,50 @@ def check():
 
     interconnects_config_match = True  # 追蹤 switch interface 與 YAML config 是否一致
 
-    # 逐一檢查每個設備
-    for device in device_list:
-        print(f"Checking {device['file']} ({device['hostname']})...")
-
-        results = check_device_interface_connectivity(device, username, password)
-
-        if results['connected']:
-            if results['interface_results']:
-                print("Interface Status Check (interfaces without policy):")
-                for interface_result in results['interface_results']:
-                    name = interface_result['name']
-                    description = interface_result['description']
-                    status = interface_result['status']
-
-                    expected = interface_result.get('expected_enable', True)
-                    matches = interface_result.get('matches_config', False)
-
-                    if description:
-                        status_line = f"  {name} to {description}: {status} (expected_enable={expected}) -> match={matches}"
-                    else:
-                        status_line = f"  {name}: {status} (expected_enable={expected}) -> match={matches}"
-
-                    print(status_line)
-
-                    # 如果與 YAML 設定不一致，標記為檢查失敗
-                    if not matches:
-                        interconnects_config_match = False
+    # 以 thread pool 並行檢查每個設備（SSH 為 I/O bound），結果依完成順序輸出
+    with ThreadPoolExecutor(max_workers=min(32, len(device_list))) as executor:
+        futures = {
+            executor.submit(check_device_interface_connectivity, device, username, password): device
+            for device in device_list
+        }
+        for future in as_completed(futures):
+            device = futures[future]
+            print(f"Checking {device['file']} ({device['hostname']})...")
+
+            results = future.result()
+
+            if results['connected']:
+                if results['error_message']:
+                    # 已連線但讀取 YAML 或執行指令時失敗
+                    print(f"  Check failed: {results['error_message']}")
+                    interconnects_config_match = False
+                elif results['interface_results']:
+                    print("Interface Status Check (interfaces without policy):")
+                    for interface_result in results['interface_results']:
+                        name = interface_result['name']
+                        description = interface_result['description']
+                        status = interface_result['status']
+
+                        expected = interface_result.get('expected_enable', True)
+                        matches = interface_result.get('matches_config', False)
+
+                        if description:
+                            status_line = f"  {name} to {description}: {status} (expected_enable={expected}) -> match={matches}"
+                        else:
+                            status_line = f"  {name}: {status} (expected_enable={expected}) -> match={matches}"
+
+                        print(status_line)
+
+                        # 如果與 YAML 設定不一致，標記為檢查失敗
+                        if not matches:
+                            interconnects_config_match = False
+                else:
+                    print("  No interfaces without policy found for status check")
             else:
-                print("  No interfaces without policy found for status check")
-        else:
-            print(f"  Connection failed: {results['error_message']}")
-            interconnects_config_match = False
+                print(f"  Connection failed: {results['error_message']}")
+                interconnects_config_match = False
 
-        print()
+            print()
 
     print("Interface connectivity check completed.")
     print("=" * 60)
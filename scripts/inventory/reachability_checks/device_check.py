@@ -1,3 +1,4 @@
+import io
 import os
 import constants
 import yaml
@@ -10,10 +11,10 @@ def parse_inventory_output(output):
     """
     解析show inventory輸出，提取Platform (PID)和Serial Number (SN)
     """
-    lines = output.split('\n')
     chassis_found = False
     
-    for line in lines:
+    # 逐行讀取，找到後即可提前返回，不需先切出完整的行列表
+    for line in io.StringIO(output):
         line = line.strip()
         
         # 找到"Chassis"行
@@ -43,9 +44,7 @@ def parse_version_output(output):
     """
     解析show version輸出，提取NXOS版本
     """
-    lines = output.split('\n')
-    
-    for line in lines:
+    for line in io.StringIO(output):
         line = line.strip()
         if 'NXOS: version' in line:
             # 提取version後的字串